@@ -0,0 +1,105 @@
+"""
+Request Batcher - Coalesce concurrent queries into batched upstream calls
+"""
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+import asyncio
+
+
+class RequestBatcher:
+    """
+    Micro-batching coalescer for concurrent requests.
+
+    Submitted items are queued and drained into one batch once `max_batch`
+    items are waiting or `max_wait` seconds have passed since the first one
+    arrived. The batch handler returns one result per item, in order; an
+    Exception in the result list is raised to that item's caller only.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 32,
+        max_wait: float = 0.075
+    ):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def start(self):
+        """Start the background drain loop on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop draining, cancel in-flight batches and fail every waiting caller."""
+        tasks = [self._worker, *self._dispatches] if self._worker else list(self._dispatches)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = None
+        
+        # Items still queued were never collected into a batch
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch."""
+        if self._worker is None:
+            raise RuntimeError("batcher stopped")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                except asyncio.CancelledError:
+                    self._fail(batch)
+                    raise
+
+            # Dispatch without blocking collection of the next batch
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+        except asyncio.CancelledError:
+            self._fail(batch)
+            raise
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # Caller went away (e.g. client disconnected)
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Any, asyncio.Future]]):
+        """Fail the callers of items that will never be processed."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("batcher stopped"))
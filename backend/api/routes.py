@@ -1,17 +1,22 @@
 """
 API Routes for COREP Reporting Assistant
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Optional, List, Dict, Any
 from datetime import datetime
+import asyncio
+import orjson
 
-from config import get_settings, Settings
 from llm.llm_client import LLMClient
-from llm.structured_output import COREPFieldOutput, QueryResponse
+from llm.structured_output import COREPFieldOutput, FieldMapping, QueryResponse
 from templates.c01_own_funds import C01OwnFundsTemplate, populate_template
 from templates.validator import ValidationEngine
 from audit.audit_logger import AuditLogger
+from cache.response_cache import ResponseCache
+from rag.vector_store import RetrievedDocument, VectorStore
+from api.batcher import RequestBatcher
 
 
 router = APIRouter()
@@ -34,76 +39,309 @@ class TemplateResponse(BaseModel):
     timestamp: str
 
 
-@router.post("/query", response_model=TemplateResponse)
+def get_vector_store(request: Request) -> VectorStore:
+    """Get the shared vector store."""
+    return request.app.state.vector_store
+
+
+def get_llm(request: Request) -> LLMClient:
+    """Get the shared LLM client."""
+    return request.app.state.llm_client
+
+
+def get_validator(request: Request) -> ValidationEngine:
+    """Get the shared validation engine."""
+    return request.app.state.validator
+
+
+def get_response_cache(request: Request) -> ResponseCache:
+    """Get the shared response cache."""
+    return request.app.state.response_cache
+
+
+def get_batcher(request: Request) -> RequestBatcher:
+    """Get the request batcher started in the application lifespan."""
+    return request.app.state.batcher
+
+
+@router.post("/query", response_model=None, responses={200: {"model": TemplateResponse}})
 async def process_query(
     request: QueryRequest,
-    settings: Settings = Depends(get_settings)
+    response_cache: ResponseCache = Depends(get_response_cache),
+    batcher: RequestBatcher = Depends(get_batcher)
 ):
     """
     Process a natural language query and return a populated COREP template.
     
-    Flow:
-    1. Retrieve relevant regulatory text via RAG
-    2. Send to LLM for structured field extraction
-    3. Map to COREP template
-    4. Validate against EBA rules
-    5. Generate audit trail
+    Concurrent queries are coalesced into batches (see `process_batch`).
+    """
+    try:
+        return ORJSONResponse(await _answer_query(request, response_cache, batcher))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/query/batch",
+    response_model=None,
+    responses={200: {"model": List[TemplateResponse]}}
+)
+async def process_query_batch(
+    requests: List[QueryRequest],
+    response_cache: ResponseCache = Depends(get_response_cache),
+    batcher: RequestBatcher = Depends(get_batcher)
+):
+    """Process several queries at once, returning responses in request order."""
+    try:
+        return ORJSONResponse(await asyncio.gather(*[
+            _answer_query(request, response_cache, batcher)
+            for request in requests
+        ]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/query/stream")
+async def process_query_stream(
+    request: QueryRequest,
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm),
+    validator: ValidationEngine = Depends(get_validator),
+    response_cache: ResponseCache = Depends(get_response_cache)
+):
+    """
+    Process a query as a Server-Sent Events stream.
+    
+    Emits a `field` event for each field as soon as the LLM has generated it,
+    then a `result` event with the full TemplateResponse (or an `error` event).
     """
+    return StreamingResponse(
+        _stream_query(request, vector_store, llm_client, validator, response_cache),
+        media_type="text/event-stream"
+    )
+
+
+async def _stream_query(
+    request: QueryRequest,
+    vector_store: VectorStore,
+    llm_client: LLMClient,
+    validator: ValidationEngine,
+    response_cache: ResponseCache
+) -> AsyncIterator[bytes]:
+    """Run the query pipeline, yielding SSE events as results become available."""
     try:
-        # Initialize components
-        llm_client = LLMClient(settings)
-        validator = ValidationEngine()
-        audit_logger = AuditLogger()
+        # Step 0: Check the response cache (exact, then semantic)
+        cache_key = response_cache.make_key(
+            request.question, request.scenario, request.template_type
+        )
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            yield _sse("result", _from_cache(cached))
+            return
         
-        # Step 1: Retrieve relevant regulatory text
-        from main import vector_store
-        retrieved_docs = await vector_store.retrieve(
-            query=request.question,
-            scenario=request.scenario,
-            k=5
+        # Step 1: Embed once (retrieval text and bare question), then retrieve
+        # relevant regulatory text alongside the semantic cache lookup
+        search_embedding, question_embedding = await vector_store.embed_queries(
+            [(request.question, request.scenario), (request.question, None)]
         )
+        cached, retrieved_docs = await asyncio.gather(
+            response_cache.get_similar(
+                question_embedding, request.template_type, request.scenario
+            ),
+            vector_store.retrieve(
+                query=request.question,
+                scenario=request.scenario,
+                k=5,
+                query_embedding=search_embedding
+            )
+        )
+        if cached is not None:
+            yield _sse("result", _from_cache(cached))
+            return
         
-        # Step 2: LLM processing for structured output
-        llm_response = await llm_client.extract_corep_fields(
+        # Step 2: Stream fields out as the LLM generates them
+        llm_response = None
+        async for item in llm_client.stream_corep_fields(
             question=request.question,
             scenario=request.scenario,
             context=retrieved_docs,
             template_type=request.template_type
-        )
+        ):
+            if isinstance(item, FieldMapping):
+                yield _sse("field", item.model_dump())
+            else:
+                llm_response = item
         
-        # Step 3: Map to COREP template
-        template = populate_template(
-            template_type=request.template_type,
-            field_data=llm_response.fields
+        # Steps 3-5 need every field, so they run once the stream completes
+        response = _build_response(request, retrieved_docs, llm_response, validator)
+        await response_cache.put(
+            cache_key, response, question_embedding, request.template_type, request.scenario
         )
-        
-        # Step 4: Validate
-        validation_results = validator.validate(
-            template=template,
-            template_type=request.template_type
+        yield _sse("result", response)
+    
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+
+
+def _sse(event: str, data: Any) -> bytes:
+    """Format a Server-Sent Event."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _answer_query(
+    request: QueryRequest,
+    response_cache: ResponseCache,
+    batcher: RequestBatcher
+) -> Dict[str, Any]:
+    """Serve a query from the exact-match cache, or queue it for the next batch."""
+    cache_key = response_cache.make_key(
+        request.question, request.scenario, request.template_type
+    )
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return _from_cache(cached)
+    
+    return await batcher.submit(request)
+
+
+async def process_batch(
+    requests: List[QueryRequest],
+    vector_store: VectorStore,
+    llm_client: LLMClient,
+    validator: ValidationEngine,
+    response_cache: ResponseCache
+) -> List[Any]:
+    """
+    Answer a batch of coalesced queries.
+    
+    Flow:
+    0. Embed all queries in one call
+    1. Retrieve relevant regulatory text in one vector search, overlapped
+       with the semantic cache lookups; semantic hits are served directly
+    2. Send to LLM for structured field extraction, concurrently
+    3. Map to COREP template
+    4. Validate against EBA rules
+    5. Generate audit trail
+    
+    Returns one TemplateResponse dict, or the Exception raised for it, per request.
+    """
+    results: List[Any] = [None] * len(requests)
+    
+    # Step 0: Embed once (retrieval text and bare question for each request)
+    embeddings = await vector_store.embed_queries(
+        [(request.question, request.scenario) for request in requests]
+        + [(request.question, None) for request in requests]
+    )
+    search_embeddings = embeddings[:len(requests)]
+    question_embeddings = embeddings[len(requests):]
+    
+    # Step 1: Retrieve relevant regulatory text alongside the semantic cache lookups
+    similar, all_retrieved = await asyncio.gather(
+        asyncio.gather(*[
+            response_cache.get_similar(embedding, request.template_type, request.scenario)
+            for request, embedding in zip(requests, question_embeddings)
+        ]),
+        vector_store.retrieve_many(search_embeddings, k=5)
+    )
+    pending = []
+    for i, cached in enumerate(similar):
+        if cached is not None:
+            results[i] = _from_cache(cached)
+        else:
+            pending.append(i)
+    
+    if not pending:
+        return results
+    retrieved = [all_retrieved[i] for i in pending]
+    
+    # Step 2: LLM processing for structured output
+    llm_responses = await asyncio.gather(*[
+        llm_client.extract_corep_fields(
+            question=requests[i].question,
+            scenario=requests[i].scenario,
+            context=docs,
+            template_type=requests[i].template_type
         )
+        for i, docs in zip(pending, retrieved)
+    ], return_exceptions=True)
+    
+    # Steps 3-5: Template, validation and audit trail per request
+    for i, docs, llm_response in zip(pending, retrieved, llm_responses):
+        request = requests[i]
+        if isinstance(llm_response, Exception):
+            results[i] = llm_response
+            continue
         
-        # Step 5: Generate audit trail
-        audit_trail = audit_logger.create_trail(
-            fields=llm_response.fields,
-            sources=retrieved_docs,
-            reasoning=llm_response.reasoning
-        )
+        try:
+            response = _build_response(request, docs, llm_response, validator)
+        except Exception as e:
+            results[i] = e
+            continue
         
-        return TemplateResponse(
-            template_type=request.template_type,
-            template_data=template.model_dump(),
-            validation_results=validation_results,
-            audit_trail=audit_trail,
-            retrieved_sources=[
-                {"content": doc.content[:200] + "...", "reference": doc.reference}
-                for doc in retrieved_docs
-            ],
-            timestamp=datetime.now().isoformat()
+        await response_cache.put(
+            response_cache.make_key(request.question, request.scenario, request.template_type),
+            response,
+            question_embeddings[i],
+            request.template_type,
+            request.scenario
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        results[i] = response
+    
+    return results
+
+
+def _build_response(
+    request: QueryRequest,
+    retrieved_docs: List[RetrievedDocument],
+    llm_response: COREPFieldOutput,
+    validator: ValidationEngine
+) -> Dict[str, Any]:
+    """Map extracted fields to the template, validate and build the audit trail."""
+    audit_logger = AuditLogger()
+    
+    # Step 3: Map to COREP template
+    template = populate_template(
+        template_type=request.template_type,
+        field_data=llm_response.fields
+    )
+    
+    # Step 4: Validate
+    validation_results = validator.validate(
+        template=template,
+        template_type=request.template_type
+    )
+    
+    # Step 5: Generate audit trail
+    audit_trail = audit_logger.create_trail(
+        fields=llm_response.fields,
+        sources=retrieved_docs,
+        reasoning=llm_response.reasoning
+    )
+    
+    # Built as a plain dict matching TemplateResponse; routes wrap it in an
+    # ORJSONResponse so it is serialised without a model or encoder pass
+    return {
+        "template_type": request.template_type,
+        "template_data": template.model_dump(),
+        "validation_results": validation_results,
+        "audit_trail": audit_trail,
+        "retrieved_sources": [
+            {"content": f"{doc.content[:200]}…", "reference": doc.reference}
+            for doc in retrieved_docs
+        ],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def _from_cache(cached: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a cached response with a fresh timestamp."""
+    return {**cached, "timestamp": datetime.now().isoformat()}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(response_cache: ResponseCache = Depends(get_response_cache)):
+    """Get response cache hit/miss/eviction statistics."""
+    return response_cache.stats()
 
 
 @router.get("/templates/{template_type}")
@@ -120,7 +358,9 @@ async def get_template_schema(template_type: str):
 
 
 @router.get("/validation-rules/{template_type}")
-async def get_validation_rules(template_type: str):
+async def get_validation_rules(
+    template_type: str,
+    validator: ValidationEngine = Depends(get_validator)
+):
     """Get validation rules for a COREP template type."""
-    validator = ValidationEngine()
     return validator.get_rules(template_type)
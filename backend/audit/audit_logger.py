@@ -4,6 +4,7 @@ Audit Logger - Track regulatory citations for each field
 from typing import List, Dict, Any
 from datetime import datetime
 from dataclasses import dataclass
+import orjson
 
 from llm.structured_output import FieldMapping
 from rag.vector_store import RetrievedDocument
@@ -52,10 +53,15 @@ class AuditLogger:
         audit_trail = []
         timestamp = datetime.now().isoformat()
         
-        # Create a lookup for sources by reference
+        # Create a lookup for sources by reference, plus normalized
+        # references for partial matching (built once per trail)
         source_lookup = {
             doc.reference: doc for doc in sources
         }
+        norm_refs = [
+            (ref.strip().lower(), doc) for ref, doc in source_lookup.items()
+            if ref.strip()
+        ]
         
         for field in fields:
             # Find the matching source document
@@ -67,9 +73,11 @@ class AuditLogger:
                 source_doc = source_lookup.get(field.source_reference)
                 
                 # Try partial match if no exact match
-                if not source_doc:
-                    for ref, doc in source_lookup.items():
-                        if field.source_reference in ref or ref in field.source_reference:
+                # (skipped for blank references, which would match everything)
+                key = field.source_reference.strip().lower()
+                if not source_doc and key:
+                    for ref, doc in norm_refs:
+                        if key in ref or ref in key:
                             source_doc = doc
                             break
                 
@@ -89,10 +97,15 @@ class AuditLogger:
             }
             
             audit_trail.append(entry)
-            self.entries.append(AuditEntry(**{
-                k: v for k, v in entry.items() 
-                if k != "confidence_indicators"
-            }))
+            self.entries.append(AuditEntry(
+                field_row=entry["field_row"],
+                field_name=entry["field_name"],
+                value=entry["value"],
+                source_reference=entry["source_reference"],
+                source_content=entry["source_content"],
+                reasoning=entry["reasoning"],
+                timestamp=timestamp
+            ))
         
         # Add overall analysis entry
         audit_trail.append({
@@ -135,10 +148,8 @@ class AuditLogger:
     
     def export_trail(self, format: str = "json") -> str:
         """Export the audit trail in specified format."""
-        import json
-        
         if format == "json":
-            return json.dumps([
+            return orjson.dumps([
                 {
                     "field_row": e.field_row,
                     "field_name": e.field_name,
@@ -148,7 +159,7 @@ class AuditLogger:
                     "timestamp": e.timestamp
                 }
                 for e in self.entries
-            ], indent=2)
+            ], option=orjson.OPT_INDENT_2).decode()
         
         # Could add CSV, PDF export etc.
         raise ValueError(f"Unsupported export format: {format}")
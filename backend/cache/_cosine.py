@@ -0,0 +1,32 @@
+"""
+Cosine Kernel - JIT-compiled nearest-neighbour search for the semantic cache
+"""
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, fastmath=True)
+def argmax_cos(q, bank):
+    """
+    Find the row of `bank` most similar to `q`.
+
+    Both are float32 and L2-normalised, so the dot product is the cosine
+    similarity. Returns (row index, similarity).
+    """
+    n, dim = bank.shape
+    sims = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        acc = np.float32(0.0)
+        for j in range(dim):
+            acc += bank[i, j] * q[j]
+        sims[i] = acc
+
+    best = np.argmax(sims)
+    return best, sims[best]
+
+
+def warm_up(dim: int = 1536):
+    """Compile (or load the cached compilation of) the kernel ahead of the first lookup."""
+    q = np.zeros(dim, dtype=np.float32)
+    q[0] = 1.0
+    argmax_cos(q, q[np.newaxis, :].copy())
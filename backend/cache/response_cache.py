@@ -0,0 +1,164 @@
+"""
+Response Cache - Exact and semantic caching of populated template responses
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import hashlib
+
+import numpy as np
+import orjson
+from cachetools import TTLCache
+
+from cache._cosine import argmax_cos, warm_up as _warm_cosine_kernel
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts entries evicted to make room for new ones."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class _SemanticIndex:
+    """L2-normalised query embeddings aligned with their response cache keys."""
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.bank: Optional[np.ndarray] = None
+
+    def add(self, key: str, vector: np.ndarray):
+        self.keys.append(key)
+        row = vector[np.newaxis, :]
+        self.bank = row if self.bank is None else np.vstack([self.bank, row])
+
+    def prune(self, live_keys):
+        """Drop rows whose responses have expired or been evicted."""
+        keep = [i for i, key in enumerate(self.keys) if key in live_keys]
+        if len(keep) == len(self.keys):
+            return
+        self.keys = [self.keys[i] for i in keep]
+        self.bank = self.bank[keep] if keep else None
+
+    def best_match(self, vector: np.ndarray) -> tuple:
+        """Return (key, cosine similarity) of the closest cached query."""
+        if self.bank is None:
+            return None, 0.0
+        idx, similarity = argmax_cos(vector, self.bank)
+        return self.keys[idx], float(similarity)
+
+
+class ResponseCache:
+    """
+    Two-tier cache for /query responses.
+
+    - Exact tier: keyed by a hash of the canonical (question, scenario, template_type) tuple
+    - Semantic tier: matches the question embedding against recently cached
+      questions with the same template type and the exact same scenario, so
+      only the question wording is fuzzy-matched, never the reported figures
+    """
+
+    def __init__(self, maxsize: int = 2000, ttl: float = 600, similarity_threshold: float = 0.95):
+        self.similarity_threshold = similarity_threshold
+        self._responses = _CountingTTLCache(maxsize=maxsize, ttl=ttl)
+        self._indexes: Dict[str, _SemanticIndex] = {}
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(question: str, scenario: Optional[str], template_type: str) -> str:
+        """Build the exact-match key for a request."""
+        return hashlib.sha256(orjson.dumps([question, scenario, template_type])).hexdigest()
+    
+    @staticmethod
+    def _partition(template_type: str, scenario: Optional[str]) -> str:
+        """Semantic index partition for a template type and scenario."""
+        return hashlib.sha256(orjson.dumps([template_type, scenario])).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an exact match. Misses are counted by `get_similar`."""
+        async with self._lock:
+            response = self._responses.get(key)
+            if response is not None:
+                self.hits += 1
+            return response
+
+    async def get_similar(
+        self,
+        embedding: Optional[Sequence[float]],
+        template_type: str,
+        scenario: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a semantically equivalent question for the same template and scenario.
+        
+        `embedding` is the embedding of the question alone.
+        """
+        async with self._lock:
+            index = self._indexes.get(self._partition(template_type, scenario))
+            if embedding is not None and index is not None:
+                key, similarity = index.best_match(self._normalize(embedding))
+                response = self._responses.get(key) if key else None
+                if response is not None and similarity >= self.similarity_threshold:
+                    self.semantic_hits += 1
+                    return response
+            self.misses += 1
+            return None
+
+    async def put(
+        self,
+        key: str,
+        response: Dict[str, Any],
+        embedding: Optional[Sequence[float]],
+        template_type: str,
+        scenario: Optional[str]
+    ):
+        """Cache a response, indexing its question embedding for semantic lookup."""
+        async with self._lock:
+            self._responses[key] = response
+            if embedding is None:
+                return
+            index = self._indexes.setdefault(
+                self._partition(template_type, scenario), _SemanticIndex()
+            )
+            index.prune(self._responses)
+            if key not in index.keys:
+                index.add(key, self._normalize(embedding))
+
+    async def invalidate(self):
+        """Drop all cached responses, e.g. after the document corpus changes."""
+        async with self._lock:
+            self._responses.clear()
+            self._indexes.clear()
+
+    @staticmethod
+    def warm_up():
+        """Compile the semantic search kernel so the first lookup doesn't pay JIT cost."""
+        _warm_cosine_kernel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss/eviction counters."""
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "size": len(self._responses),
+            "maxsize": self._responses.maxsize,
+            "ttl": self._responses.ttl,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self._responses.evictions,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0
+        }
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
@@ -17,10 +17,24 @@ class Settings(BaseSettings):
     # ChromaDB Configuration
     chroma_persist_directory: str = "./data/chroma_db"
     
+    # Response Cache Configuration
+    response_cache_maxsize: int = 2000
+    response_cache_ttl: int = 600
+    semantic_cache_threshold: float = 0.95
+    
+    # Request Batching Configuration
+    batch_max_size: int = 32
+    batch_max_wait_seconds: float = 0.075
+    
     # Application Settings
     app_name: str = "COREP Reporting Assistant"
     debug: bool = True
     
+    # Server Settings (used by `python main.py` / run.sh)
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 1
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,9 +1,13 @@
 """
 LLM Client - OpenAI integration for COREP field extraction
 """
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Union
 from openai import AsyncOpenAI
-import json
+from pydantic import TypeAdapter
+import httpx
+import ijson
+import io
+import orjson
 
 from config import Settings
 from rag.vector_store import RetrievedDocument
@@ -11,14 +15,30 @@ from llm.structured_output import COREPFieldOutput, FieldMapping
 from llm.prompts import get_extraction_prompt
 
 
+# Built once at import; FieldMapping defaults (column "010", GBP) match the
+# keys the extraction prompt asks the LLM to return
+_FIELDS_ADAPTER = TypeAdapter(List[FieldMapping])
+
+
 class LLMClient:
     """OpenAI LLM client for regulatory field extraction."""
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # One pooled HTTP/2 client for the lifetime of the app, so concurrent
+        # completions multiplex over warm connections instead of new TLS handshakes
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=self._http)
         self.model = settings.openai_model
     
+    async def aclose(self):
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
+    
     async def extract_corep_fields(
         self,
         question: str,
@@ -31,6 +51,76 @@ class LLMClient:
         
         Returns structured output mapping values to template fields.
         """
+        # Call LLM with JSON mode
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._extraction_messages(question, scenario, context, template_type),
+            response_format={"type": "json_object"},
+            temperature=0.1,  # Low temperature for consistency
+            max_tokens=2000
+        )
+        
+        # Parse response
+        response_text = response.choices[0].message.content
+        response_data = orjson.loads(response_text)
+        
+        # Validate all fields in one pass of the compiled validator
+        fields = _FIELDS_ADAPTER.validate_python(response_data.get("fields", []))
+        return self._to_output(template_type, fields, response_data)
+    
+    async def stream_corep_fields(
+        self,
+        question: str,
+        scenario: Optional[str],
+        context: List[RetrievedDocument],
+        template_type: str
+    ) -> AsyncIterator[Union[FieldMapping, COREPFieldOutput]]:
+        """
+        Stream COREP field extraction.
+        
+        Yields each FieldMapping as soon as its JSON object has been fully
+        generated, then the complete COREPFieldOutput as the final item.
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._extraction_messages(question, scenario, context, template_type),
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            max_tokens=2000,
+            stream=True
+        )
+        
+        # Incrementally decode fields[] items as the JSON arrives
+        buffer = io.BytesIO()
+        decoded = ijson.sendable_list()
+        parser = ijson.items_coro(decoded, "fields.item", use_float=True)
+        fields = []
+        
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            data = chunk.choices[0].delta.content.encode("utf-8")
+            buffer.write(data)
+            parser.send(data)
+            for field_data in decoded:
+                field = FieldMapping.model_validate(field_data)
+                fields.append(field)
+                yield field
+            del decoded[:]
+        parser.close()
+        
+        # Remaining top-level keys (reasoning, confidence, warnings)
+        response_data = orjson.loads(buffer.getvalue())
+        yield self._to_output(template_type, fields, response_data)
+    
+    def _extraction_messages(
+        self,
+        question: str,
+        scenario: Optional[str],
+        context: List[RetrievedDocument],
+        template_type: str
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for field extraction."""
         # Build context string from retrieved documents
         context_text = "\n\n---\n\n".join([
             f"**Source: {doc.reference}**\n{doc.content}"
@@ -45,35 +135,18 @@ class LLMClient:
             context=context_text
         )
         
-        # Call LLM with JSON mode
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1,  # Low temperature for consistency
-            max_tokens=2000
-        )
-        
-        # Parse response
-        response_text = response.choices[0].message.content
-        response_data = json.loads(response_text)
-        
-        # Convert to structured output
-        fields = []
-        for field_data in response_data.get("fields", []):
-            fields.append(FieldMapping(
-                row=field_data.get("row"),
-                column=field_data.get("column", "010"),
-                field_name=field_data.get("field_name"),
-                value=field_data.get("value"),
-                currency=field_data.get("currency", "GBP"),
-                source_reference=field_data.get("source_reference"),
-                reasoning=field_data.get("reasoning")
-            ))
-        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    @staticmethod
+    def _to_output(
+        template_type: str,
+        fields: List[FieldMapping],
+        response_data: Dict[str, Any]
+    ) -> COREPFieldOutput:
+        """Convert the parsed LLM response to structured output."""
         return COREPFieldOutput(
             template_type=template_type,
             fields=fields,
@@ -120,4 +193,4 @@ Regulatory Context:
             temperature=0.1
         )
         
-        return json.loads(response.choices[0].message.content)
+        return orjson.loads(response.choices[0].message.content)
@@ -1,18 +1,15 @@
 """
 Prompt Templates for COREP Field Extraction
 """
-from typing import Tuple, Optional
+from typing import Iterable, Tuple, Optional
+from functools import lru_cache
 
 
-def get_extraction_prompt(
-    template_type: str,
-    question: str,
-    scenario: Optional[str],
-    context: str
-) -> Tuple[str, str]:
-    """Get system and user prompts for COREP field extraction."""
+@lru_cache(maxsize=16)
+def _system_prompt_for(template_type: str) -> str:
+    """Build the static extraction system prompt for a template type."""
     
-    system_prompt = f"""You are an expert regulatory reporting assistant specializing in PRA COREP submissions for UK banks.
+    return f"""You are an expert regulatory reporting assistant specializing in PRA COREP submissions for UK banks.
 
 Your task is to analyze user questions and scenarios, then extract values for COREP {template_type} template fields based on the provided regulatory context.
 
@@ -60,6 +57,23 @@ Return a JSON object with this structure:
 4. Only populate fields you can justify from the context
 5. Use GBP as the default currency for UK banks"""
 
+
+def warm_prompt_cache(template_types: Iterable[str]):
+    """Pre-build system prompts so the first request doesn't pay for formatting."""
+    for template_type in template_types:
+        _system_prompt_for(template_type)
+
+
+def get_extraction_prompt(
+    template_type: str,
+    question: str,
+    scenario: Optional[str],
+    context: str
+) -> Tuple[str, str]:
+    """Get system and user prompts for COREP field extraction."""
+    
+    system_prompt = _system_prompt_for(template_type)
+
     user_prompt = f"""## User Question
 {question}
 
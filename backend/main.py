@@ -3,38 +3,73 @@ COREP Reporting Assistant - FastAPI Application
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+from functools import partial
 
 from config import get_settings
-from api.routes import router
+from api.routes import router, process_batch
+from api.batcher import RequestBatcher
 from rag.vector_store import VectorStore
-
-
-# Global vector store instance
-vector_store: VectorStore = None
+from llm.llm_client import LLMClient
+from llm.prompts import warm_prompt_cache
+from templates.validator import ValidationEngine
+from cache.response_cache import ResponseCache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler - initialize resources on startup."""
-    global vector_store
     settings = get_settings()
     
+    # Response cache, dropped whenever the document corpus changes
+    app.state.response_cache = ResponseCache(
+        maxsize=settings.response_cache_maxsize,
+        ttl=settings.response_cache_ttl,
+        similarity_threshold=settings.semantic_cache_threshold
+    )
+    
     # Initialize vector store
-    vector_store = VectorStore(settings)
-    await vector_store.initialize()
+    app.state.vector_store = VectorStore(
+        settings, on_corpus_change=app.state.response_cache.invalidate
+    )
+    await app.state.vector_store.initialize()
+    
+    # Pre-build static system prompts and compile the semantic cache kernel
+    warm_prompt_cache(["C01"])
+    app.state.response_cache.warm_up()
+    
+    # Shared request-independent components
+    app.state.llm_client = LLMClient(settings)
+    app.state.validator = ValidationEngine()
+    
+    # Start coalescing concurrent queries into batches
+    app.state.batcher = RequestBatcher(
+        partial(
+            process_batch,
+            vector_store=app.state.vector_store,
+            llm_client=app.state.llm_client,
+            validator=app.state.validator,
+            response_cache=app.state.response_cache
+        ),
+        max_batch=settings.batch_max_size,
+        max_wait=settings.batch_max_wait_seconds
+    )
+    app.state.batcher.start()
     
     yield
     
     # Cleanup on shutdown
-    pass
+    await app.state.batcher.stop()
+    await app.state.llm_client.aclose()
 
 
 app = FastAPI(
     title="COREP Reporting Assistant",
     description="LLM-assisted regulatory reporting for PRA COREP submissions",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -64,3 +99,17 @@ async def root():
 async def health():
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    settings = get_settings()
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port,
+        loop="uvloop",
+        http="httptools",
+        workers=settings.workers
+    )
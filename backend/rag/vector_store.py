@@ -1,17 +1,36 @@
 """
 Vector Store - ChromaDB integration for regulatory document retrieval
 """
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from langchain_openai import OpenAIEmbeddings
+from cachetools import TTLCache
+import diskcache
+import numpy as np
+import asyncio
+import hashlib
 import json
+import logging
 import os
 
 from config import Settings
 
 
+logger = logging.getLogger(__name__)
+
+
+# HNSW index parameters, tuned for high recall at k=5 on a small corpus.
+# Chroma only applies these when the collection is first created.
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 40
+}
+
+
 @dataclass
 class RetrievedDocument:
     """A document retrieved from the vector store."""
@@ -25,20 +44,37 @@ class RetrievedDocument:
 class VectorStore:
     """ChromaDB vector store for regulatory documents."""
     
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        on_corpus_change: Optional[Callable[[], Awaitable[None]]] = None
+    ):
         self.settings = settings
+        # Awaited after documents are added, e.g. to drop cached responses
+        self.on_corpus_change = on_corpus_change
         self.client = None
         self.collection = None
         self.embeddings = None
+        self.embedding_cache = None
+        # (embedding hash, k) -> retrieved documents
+        self._retrieval_cache = TTLCache(maxsize=1024, ttl=300)
+        self._retrieval_lock = asyncio.Lock()
+        # In-memory search index mirroring the collection (Chroma is cold storage):
+        # L2-normalised float32 embedding rows aligned with documents/metadatas
+        self._bank: Optional[np.ndarray] = None
+        self._documents: List[str] = []
+        self._metadatas: List[dict] = []
+        # False while the corpus is empty, so queries skip the embedding API
+        self._ready = False
+        self._warned_not_ready = False
         
     async def initialize(self):
         """Initialize the vector store and load documents."""
         # Initialize ChromaDB
-        self.client = chromadb.Client(ChromaSettings(
-            anonymized_telemetry=False,
-            is_persistent=True,
-            persist_directory=self.settings.chroma_persist_directory
-        ))
+        self.client = chromadb.PersistentClient(
+            path=self.settings.chroma_persist_directory,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
         
         # Initialize OpenAI embeddings
         if self.settings.openai_api_key:
@@ -47,15 +83,24 @@ class VectorStore:
                 openai_api_key=self.settings.openai_api_key
             )
         
+        # Persistent text -> embedding cache, shared across restarts
+        self.embedding_cache = diskcache.Cache(
+            os.path.join(self.settings.chroma_persist_directory, "emb_cache")
+        )
+        
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
             name="corep_regulations",
-            metadata={"hnsw:space": "cosine"}
+            metadata=HNSW_METADATA
         )
         
         # Load sample data if collection is empty
         if self.collection.count() == 0:
             await self._load_sample_data()
+        
+        # Serve queries from memory; the collection is only read back here
+        self._refresh_bank()
+        self._ready = self.collection.count() > 0
     
     async def _load_sample_data(self):
         """Load sample regulatory documents into the vector store."""
@@ -74,12 +119,12 @@ class VectorStore:
             if self.embeddings and all_docs:
                 # Generate embeddings
                 texts = [doc["content"] for doc in all_docs]
-                embeddings = await self.embeddings.aembed_documents(texts)
+                embeddings = await self._cached_embed_documents(texts)
                 
                 # Add to collection
                 self.collection.add(
                     ids=[f"doc_{i}" for i in range(len(all_docs))],
-                    embeddings=embeddings,
+                    embeddings=[e.tolist() for e in embeddings],
                     documents=texts,
                     metadatas=[{
                         "reference": doc.get("reference", ""),
@@ -91,63 +136,199 @@ class VectorStore:
             # Sample data not yet created - will be populated later
             pass
     
+    async def embed_query(
+        self,
+        query: str,
+        scenario: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Generate the retrieval embedding for a query and optional scenario."""
+        if not self.embeddings or not self._check_ready():
+            return None
+        
+        return await self._cached_embed(self._search_text(query, scenario))
+    
+    async def embed_queries(
+        self,
+        queries: List[Tuple[str, Optional[str]]]
+    ) -> List[Optional[np.ndarray]]:
+        """Generate retrieval embeddings for many (query, scenario) pairs in one call."""
+        if not self.embeddings or not self._check_ready():
+            return [None] * len(queries)
+        
+        return await self._cached_embed_documents([
+            self._search_text(query, scenario) for query, scenario in queries
+        ])
+    
     async def retrieve(
         self,
         query: str,
         scenario: Optional[str] = None,
-        k: int = 5
+        k: int = 5,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[RetrievedDocument]:
         """Retrieve relevant documents for a query."""
-        if not self.embeddings or not self.collection:
+        if not self.embeddings or not self.collection or not self._check_ready():
             return []
         
-        # Combine query and scenario for better retrieval
-        search_text = query
+        # Generate query embedding unless the caller already has one
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query, scenario)
+        
+        return (await self.retrieve_many([query_embedding], k=k))[0]
+    
+    async def retrieve_many(
+        self,
+        query_embeddings: List[Optional[np.ndarray]],
+        k: int = 5
+    ) -> List[List[RetrievedDocument]]:
+        """Retrieve relevant documents for several query embeddings in one search."""
+        if (
+            not self.embeddings or not self.collection or not query_embeddings
+            or not self._check_ready()
+        ):
+            return [[] for _ in query_embeddings]
+        
+        # Serve repeated embeddings from the retrieval cache
+        keys = [
+            (hashlib.sha256(np.asarray(e, dtype=np.float32).tobytes()).digest(), k)
+            for e in query_embeddings
+        ]
+        async with self._retrieval_lock:
+            docs_per_query = [self._retrieval_cache.get(key) for key in keys]
+        missing = [i for i, docs in enumerate(docs_per_query) if docs is None]
+        if not missing:
+            return [list(docs) for docs in docs_per_query]
+        
+        # Cosine similarity of every query against the in-memory bank in one matmul
+        queries = np.stack([np.asarray(query_embeddings[i], dtype=np.float32) for i in missing])
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        sims = queries @ self._bank.T if self._bank is not None else None
+        
+        async with self._retrieval_lock:
+            for n, i in enumerate(missing):
+                docs = self._top_k(sims[n], k) if sims is not None else []
+                self._retrieval_cache[keys[i]] = docs
+                docs_per_query[i] = docs
+        
+        return [list(docs) for docs in docs_per_query]
+    
+    @staticmethod
+    def _search_text(query: str, scenario: Optional[str]) -> str:
+        """Combine query and scenario for better retrieval."""
         if scenario:
-            search_text = f"{query}\n\nScenario: {scenario}"
+            return f"{query}\n\nScenario: {scenario}"
+        return query
+    
+    def _top_k(self, sims: np.ndarray, k: int) -> List[RetrievedDocument]:
+        """Convert one query's similarity row to its k best RetrievedDocuments."""
+        k = min(k, sims.shape[0])
+        if k <= 0:
+            return []
         
-        # Generate query embedding
-        query_embedding = await self.embeddings.aembed_query(search_text)
+        # Partial sort for the top k, then order just those k
+        idx = np.argpartition(-sims, k - 1)[:k]
+        idx = idx[np.argsort(-sims[idx])]
         
-        # Search collection
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"]
-        )
+        return [
+            RetrievedDocument(
+                content=self._documents[j],
+                reference=self._metadatas[j].get("reference", f"Document {rank+1}"),
+                article=self._metadatas[j].get("article"),
+                section=self._metadatas[j].get("section"),
+                score=float(sims[j])
+            )
+            for rank, j in enumerate(idx)
+        ]
+    
+    def _refresh_bank(self):
+        """Rebuild the in-memory search index from the collection."""
+        data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        if not data["ids"]:
+            self._bank, self._documents, self._metadatas = None, [], []
+            return
         
-        # Convert to RetrievedDocument objects
-        docs = []
-        if results and results["documents"]:
-            for i, (doc, metadata, distance) in enumerate(zip(
-                results["documents"][0],
-                results["metadatas"][0],
-                results["distances"][0]
-            )):
-                docs.append(RetrievedDocument(
-                    content=doc,
-                    reference=metadata.get("reference", f"Document {i+1}"),
-                    article=metadata.get("article"),
-                    section=metadata.get("section"),
-                    score=1 - distance  # Convert distance to similarity score
-                ))
-        
-        return docs
+        bank = np.ascontiguousarray(np.stack(data["embeddings"]), dtype=np.float32)
+        bank /= np.linalg.norm(bank, axis=1, keepdims=True)
+        self._bank = bank
+        self._documents = data["documents"]
+        self._metadatas = [metadata or {} for metadata in data["metadatas"]]
     
     async def add_document(self, content: str, reference: str, metadata: dict = None):
         """Add a document to the vector store."""
         if not self.embeddings or not self.collection:
             return
         
-        embedding = await self.embeddings.aembed_documents([content])
+        embeddings = await self._cached_embed_documents([content])
         doc_id = f"doc_{self.collection.count()}"
         
         self.collection.add(
             ids=[doc_id],
-            embeddings=embedding,
+            embeddings=[e.tolist() for e in embeddings],
             documents=[content],
             metadatas=[{
                 "reference": reference,
                 **(metadata or {})
             }]
         )
+        
+        # Cached retrievals and responses may reflect the previous corpus
+        async with self._retrieval_lock:
+            self._refresh_bank()
+            self._retrieval_cache.clear()
+        self._ready = True
+        if self.on_corpus_change is not None:
+            await self.on_corpus_change()
+    
+    def _check_ready(self) -> bool:
+        """Whether there are documents to retrieve; warns the first time there aren't."""
+        if not self._ready and not self._warned_not_ready:
+            logger.warning(
+                "Vector store is empty (sample data missing?) - skipping retrieval "
+                "and query embeddings until documents are added"
+            )
+            self._warned_not_ready = True
+        return self._ready
+    
+    def _embedding_key(self, text: str) -> bytes:
+        """Cache key for a text under the configured embedding model."""
+        return hashlib.sha256(
+            f"{self.settings.openai_embedding_model}\n{text}".encode("utf-8")
+        ).digest()
+    
+    async def _cached_embed(self, text: str) -> np.ndarray:
+        """Embed a single query text, reusing any cached embedding."""
+        key = self._embedding_key(text)
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            return np.frombuffer(cached, dtype=np.float32)
+        
+        embedding = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        self.embedding_cache.set(key, embedding.tobytes())
+        return embedding
+    
+    async def _cached_embed_documents(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed documents, sending only cache misses to the API in one batch."""
+        keys = [self._embedding_key(text) for text in texts]
+        embeddings = []
+        for key in keys:
+            cached = self.embedding_cache.get(key)
+            embeddings.append(
+                np.frombuffer(cached, dtype=np.float32) if cached is not None else None
+            )
+        
+        # Each distinct missing text is embedded once, then fanned out to
+        # every position it occurs at
+        missing: Dict[bytes, List[int]] = {}
+        for i, e in enumerate(embeddings):
+            if e is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            positions = list(missing.values())
+            fresh = await self.embeddings.aembed_documents([texts[p[0]] for p in positions])
+            for indexes, values in zip(positions, fresh):
+                embedding = np.asarray(values, dtype=np.float32)
+                self.embedding_cache.set(keys[indexes[0]], embedding.tobytes())
+                for i in indexes:
+                    embeddings[i] = embedding
+        
+        return embeddings
@@ -0,0 +1,10 @@
+#!/usr/bin/env sh
+# Production-style server: uvloop event loop and httptools HTTP parser
+# (both installed with uvicorn[standard]; not available on Windows).
+# Caches and the batcher are per process, so WORKERS defaults to 1.
+exec uvicorn main:app \
+    --host "${HOST:-127.0.0.1}" \
+    --port "${PORT:-8000}" \
+    --loop uvloop \
+    --http httptools \
+    --workers "${WORKERS:-1}"
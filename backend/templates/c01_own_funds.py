@@ -3,6 +3,9 @@ C01 Own Funds Template - COREP Template Schema and Mapping
 """
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
+from types import MappingProxyType
+import math
+import sys
 from llm.structured_output import FieldMapping
 
 
@@ -71,6 +74,20 @@ class C01OwnFundsTemplate(BaseModel):
         }
 
 
+# Row fields that extracted mappings may populate, in template order
+_ROW_ORDER = tuple(k for k in C01OwnFundsTemplate.model_fields if k.startswith("row_"))
+_VALID_ROW_KEYS = frozenset(_ROW_ORDER)
+
+# Rows summed into CET1 capital before regulatory adjustments (row_100)
+_CET1_COMPONENT_ATTRS = ("row_010", "row_020", "row_030", "row_040", "row_050", "row_060", "row_070")
+
+# "(-)" rows, always stored as negative amounts so totals are plain sums
+_DEDUCTION_ROW_KEYS = frozenset({"row_080", "row_090", "row_095", "row_320", "row_520"})
+
+# Totals populate_template derives when the extraction doesn't report them
+_TOTAL_ROW_KEYS = ("row_100", "row_200", "row_400", "row_600", "row_700")
+
+
 # Field metadata for display and validation
 FIELD_METADATA = {
     "row_010": {
@@ -153,6 +170,11 @@ FIELD_METADATA = {
     }
 }
 
+# Read-only view so shared metadata can't be mutated at runtime
+FIELD_METADATA = MappingProxyType({
+    sys.intern(row): MappingProxyType(meta) for row, meta in FIELD_METADATA.items()
+})
+
 
 def populate_template(template_type: str, field_data: List[FieldMapping]) -> C01OwnFundsTemplate:
     """
@@ -165,55 +187,56 @@ def populate_template(template_type: str, field_data: List[FieldMapping]) -> C01
     
     for field in field_data:
         row_key = f"row_{field.row.zfill(3)}"
-        if hasattr(C01OwnFundsTemplate, row_key):
+        if row_key in _DEDUCTION_ROW_KEYS and field.value is not None:
+            # Extractions report deductions with either sign
+            template_dict[row_key] = -abs(field.value)
+        elif row_key in _VALID_ROW_KEYS:
             template_dict[row_key] = field.value
         if field.currency:
             template_dict["currency"] = field.currency
     
-    # Calculate derived totals if not provided
-    template = C01OwnFundsTemplate(**template_dict)
+    # Values come from validated FieldMappings, so construction skips validation
+    get = template_dict.get
+    
+    # Common case: the extraction reported every total, nothing to derive
+    if all(get(k) is not None for k in _TOTAL_ROW_KEYS):
+        return C01OwnFundsTemplate.model_construct(**template_dict)
+    
+    # Calculate derived totals if not provided, then build the template once
     
     # Auto-calculate CET1 before adjustments if components are present
-    if template.row_100 is None:
-        components = [
-            template.row_010 or 0,
-            template.row_020 or 0,
-            template.row_030 or 0,
-            template.row_040 or 0,
-            template.row_050 or 0,
-            template.row_060 or 0,
-            template.row_070 or 0
-        ]
+    if get("row_100") is None:
+        components = tuple(get(a) or 0.0 for a in _CET1_COMPONENT_ATTRS)
         if any(c > 0 for c in components):
-            template.row_100 = sum(components)
+            template_dict["row_100"] = math.fsum(components)
     
-    # Auto-calculate CET1 after adjustments
-    if template.row_200 is None and template.row_100 is not None:
-        deductions = sum([
-            template.row_080 or 0,
-            template.row_090 or 0,
-            template.row_095 or 0
-        ])
-        template.row_200 = template.row_100 - abs(deductions)
+    # Auto-calculate CET1 after adjustments (deductions are negative)
+    if get("row_200") is None and get("row_100") is not None:
+        template_dict["row_200"] = (
+            template_dict["row_100"]
+            + (get("row_080") or 0)
+            + (get("row_090") or 0)
+            + (get("row_095") or 0)
+        )
     
     # Auto-calculate Tier 1
-    if template.row_400 is None:
-        cet1 = template.row_200 or 0
-        at1 = (template.row_300 or 0) + (template.row_310 or 0) - abs(template.row_320 or 0)
+    if get("row_400") is None:
+        cet1 = get("row_200") or 0
+        at1 = (get("row_300") or 0) + (get("row_310") or 0) + (get("row_320") or 0)
         if cet1 > 0 or at1 > 0:
-            template.row_400 = cet1 + at1
+            template_dict["row_400"] = cet1 + at1
     
     # Auto-calculate Tier 2
-    if template.row_600 is None:
-        t2 = (template.row_500 or 0) + (template.row_510 or 0) - abs(template.row_520 or 0)
+    if get("row_600") is None:
+        t2 = (get("row_500") or 0) + (get("row_510") or 0) + (get("row_520") or 0)
         if t2 > 0:
-            template.row_600 = t2
+            template_dict["row_600"] = t2
     
     # Auto-calculate Total Own Funds
-    if template.row_700 is None:
-        t1 = template.row_400 or 0
-        t2 = template.row_600 or 0
+    if get("row_700") is None:
+        t1 = get("row_400") or 0
+        t2 = get("row_600") or 0
         if t1 > 0 or t2 > 0:
-            template.row_700 = t1 + t2
+            template_dict["row_700"] = t1 + t2
     
-    return template
+    return C01OwnFundsTemplate.model_construct(**template_dict)
@@ -1,20 +1,235 @@
 """
 Validation Engine - EBA-style validation rules for COREP templates
 """
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+import math
+from math import isclose as _isclose
+import numpy as np
 
-from templates.c01_own_funds import C01OwnFundsTemplate, FIELD_METADATA
+from templates.c01_own_funds import (
+    C01OwnFundsTemplate, FIELD_METADATA, _CET1_COMPONENT_ATTRS, _ROW_ORDER
+)
 
 
-class ValidationResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ValidationResult:
     """Result of a single validation rule."""
     rule_id: str
     rule_name: str
     severity: str  # "ERROR" (blocking) or "WARNING" (non-blocking)
     passed: bool
     message: str
-    affected_fields: List[str]
+    affected_fields: Tuple[str, ...]
+
+
+# === Validation Check Functions ===
+#
+# Checks read a template's rows from one float64 vector in _ROW_ORDER
+# (missing rows as 0.0), extracted once per validation.
+
+# Shared result for a passing check; affected fields are an (immutable) tuple
+_OK_RESULT = (True, "", ())
+
+# Fields reported by each failing check
+_AFFECTED_CET1_TOTAL = ("row_100", "row_010", "row_020", "row_030", "row_040", "row_050", "row_060")
+_AFFECTED_TIER1_TOTAL = ("row_400", "row_200", "row_300")
+_AFFECTED_TOTAL_OWN_FUNDS = ("row_700", "row_400", "row_600")
+_AFFECTED_CET1_NEGATIVE = ("row_200",)
+_AFFECTED_CET1_COMPONENTS = ("row_010", "row_020", "row_030", "row_040", "row_050", "row_060")
+_AFFECTED_AT1_RATIO = ("row_300", "row_400")
+_AFFECTED_TIER2_LIMIT = ("row_600", "row_400")
+
+_I = {row: i for i, row in enumerate(_ROW_ORDER)}
+_CET1_COMPONENTS = np.array([_I[a] for a in _CET1_COMPONENT_ATTRS])
+_CET1_PRESENT_COMPONENTS = _CET1_COMPONENTS[:6]  # row_070 (interim profits) excluded
+_ROW_100, _ROW_200, _ROW_300 = _I["row_100"], _I["row_200"], _I["row_300"]
+_ROW_400, _ROW_600, _ROW_700 = _I["row_400"], _I["row_600"], _I["row_700"]
+
+
+def _extract_rows(t: C01OwnFundsTemplate) -> Tuple[Optional[float], ...]:
+    """Read all C01 row values in _ROW_ORDER."""
+    return tuple(getattr(t, k) for k in _ROW_ORDER)
+
+
+def _to_vector(rows: Tuple[Optional[float], ...]) -> np.ndarray:
+    """Convert row values to a float64 vector, None as 0.0."""
+    return np.fromiter((r or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a rule result so it can be handed out without sharing state."""
+    return {**result, "affected_fields": list(result["affected_fields"])}
+
+
+def _check_cet1_total(v: np.ndarray) -> tuple:
+    """Check that CET1 total equals sum of components."""
+    expected = math.fsum(v[_CET1_COMPONENTS])
+    actual = v[_ROW_100]
+    
+    if not _isclose(actual, expected, rel_tol=0.0, abs_tol=0.01):  # Allow for rounding
+        return (
+            False,
+            f"CET1 before adjustments ({actual:,.0f}) != sum of components ({expected:,.0f})",
+            _AFFECTED_CET1_TOTAL
+        )
+    return _OK_RESULT
+
+
+def _check_tier1_total(v: np.ndarray) -> tuple:
+    """Check that Tier 1 equals CET1 + AT1."""
+    cet1 = v[_ROW_200]
+    at1 = v[_ROW_300]
+    expected = cet1 + at1
+    actual = v[_ROW_400]
+    
+    if not _isclose(actual, expected, rel_tol=0.0, abs_tol=0.01):
+        return (
+            False,
+            f"Tier 1 ({actual:,.0f}) != CET1 ({cet1:,.0f}) + AT1 ({at1:,.0f})",
+            _AFFECTED_TIER1_TOTAL
+        )
+    return _OK_RESULT
+
+
+def _check_total_own_funds(v: np.ndarray) -> tuple:
+    """Check total own funds consistency."""
+    t1 = v[_ROW_400]
+    t2 = v[_ROW_600]
+    expected = t1 + t2
+    actual = v[_ROW_700]
+    
+    if not _isclose(actual, expected, rel_tol=0.0, abs_tol=0.01):
+        return (
+            False,
+            f"Total own funds ({actual:,.0f}) != Tier 1 ({t1:,.0f}) + Tier 2 ({t2:,.0f})",
+            _AFFECTED_TOTAL_OWN_FUNDS
+        )
+    return _OK_RESULT
+
+
+def _check_non_negative_cet1(v: np.ndarray) -> tuple:
+    """Check that CET1 is non-negative."""
+    cet1 = v[_ROW_200]
+    if cet1 < 0:
+        return (
+            False,
+            f"CET1 capital is negative: {cet1:,.0f}",
+            _AFFECTED_CET1_NEGATIVE
+        )
+    return _OK_RESULT
+
+
+def _check_cet1_components_present(v: np.ndarray) -> tuple:
+    """Check that at least one CET1 component is present."""
+    if not v[_CET1_PRESENT_COMPONENTS].any():
+        return (
+            False,
+            "No CET1 capital components reported",
+            _AFFECTED_CET1_COMPONENTS
+        )
+    return _OK_RESULT
+
+
+def _check_at1_ratio(v: np.ndarray) -> tuple:
+    """Check AT1 ratio is reasonable."""
+    at1 = v[_ROW_300]
+    t1 = v[_ROW_400]
+    
+    if t1 > 0 and at1 > 0:
+        ratio = at1 / t1
+        if ratio > 0.33:
+            return (
+                False,
+                f"AT1 is {ratio:.1%} of Tier 1 (typically should be ≤33%)",
+                _AFFECTED_AT1_RATIO
+            )
+    return _OK_RESULT
+
+
+def _check_tier2_limit(v: np.ndarray) -> tuple:
+    """Check Tier 2 doesn't exceed Tier 1."""
+    t1 = v[_ROW_400]
+    t2 = v[_ROW_600]
+    
+    if t2 > t1 and t1 > 0:
+        return (
+            False,
+            f"Tier 2 ({t2:,.0f}) exceeds Tier 1 ({t1:,.0f})",
+            _AFFECTED_TIER2_LIMIT
+        )
+    return _OK_RESULT
+
+
+# === Batch Failure Masks ===
+#
+# Vectorised forms of the checks over an (N, R) array of templates. They flag
+# the templates that may fail; flagged rows are re-run through the scalar
+# check, which stays the authority on the result and its message.
+
+
+def _fails_cet1_total(a: np.ndarray) -> np.ndarray:
+    return np.abs(a[:, _ROW_100] - a[:, _CET1_COMPONENTS].sum(axis=1)) > 0.01
+
+
+def _fails_tier1_total(a: np.ndarray) -> np.ndarray:
+    return np.abs(a[:, _ROW_400] - (a[:, _ROW_200] + a[:, _ROW_300])) > 0.01
+
+
+def _fails_total_own_funds(a: np.ndarray) -> np.ndarray:
+    return np.abs(a[:, _ROW_700] - (a[:, _ROW_400] + a[:, _ROW_600])) > 0.01
+
+
+def _fails_non_negative_cet1(a: np.ndarray) -> np.ndarray:
+    return a[:, _ROW_200] < 0
+
+
+def _fails_cet1_components_present(a: np.ndarray) -> np.ndarray:
+    return ~a[:, _CET1_PRESENT_COMPONENTS].any(axis=1)
+
+
+def _fails_at1_ratio(a: np.ndarray) -> np.ndarray:
+    at1, t1 = a[:, _ROW_300], a[:, _ROW_400]
+    return (t1 > 0) & (at1 > 0) & (at1 > 0.33 * t1)
+
+
+def _fails_tier2_limit(a: np.ndarray) -> np.ndarray:
+    t1, t2 = a[:, _ROW_400], a[:, _ROW_600]
+    return (t2 > t1) & (t1 > 0)
+
+
+_BATCH_MASKS = {
+    _check_cet1_total: _fails_cet1_total,
+    _check_tier1_total: _fails_tier1_total,
+    _check_total_own_funds: _fails_total_own_funds,
+    _check_non_negative_cet1: _fails_non_negative_cet1,
+    _check_cet1_components_present: _fails_cet1_components_present,
+    _check_at1_ratio: _fails_at1_ratio,
+    _check_tier2_limit: _fails_tier2_limit,
+}
+
+
+# C01 rule table, built once at import:
+# (rule_id, name, severity, check, description)
+_RULES_C01 = (
+    # Consistency rules
+    ("v0001", "CET1 Total Consistency", "ERROR", _check_cet1_total,
+     "CET1 capital before adjustments must equal sum of CET1 components"),
+    ("v0002", "Tier 1 Total Consistency", "ERROR", _check_tier1_total,
+     "Tier 1 capital must equal CET1 + AT1"),
+    ("v0003", "Total Own Funds Consistency", "ERROR", _check_total_own_funds,
+     "Total own funds must equal Tier 1 + Tier 2"),
+    ("v0004", "Non-Negative CET1", "ERROR", _check_non_negative_cet1,
+     "CET1 capital cannot be negative"),
+    # Warning rules
+    ("v0010", "Missing CET1 Components", "WARNING", _check_cet1_components_present,
+     "At least one CET1 component should be reported"),
+    ("v0011", "Large AT1 Ratio", "WARNING", _check_at1_ratio,
+     "AT1 should typically not exceed 1/3 of Tier 1 capital"),
+    ("v0012", "Tier 2 Limit", "WARNING", _check_tier2_limit,
+     "Tier 2 capital typically should not exceed Tier 1 capital"),
+)
 
 
 class ValidationEngine:
@@ -26,198 +241,108 @@ class ValidationEngine:
     - WARNING: Non-blocking but should be reviewed
     """
     
-    def __init__(self):
-        self.rules = self._load_rules()
+    __slots__ = ("_rule_tables", "_compiled", "_validate_cached")
     
-    def _load_rules(self) -> Dict[str, List[Dict]]:
-        """Load validation rules for each template type."""
-        return {
-            "C01": [
-                # Consistency rules
-                {
-                    "id": "v0001",
-                    "name": "CET1 Total Consistency",
-                    "severity": "ERROR",
-                    "check": self._check_cet1_total,
-                    "description": "CET1 capital before adjustments must equal sum of CET1 components"
-                },
-                {
-                    "id": "v0002",
-                    "name": "Tier 1 Total Consistency",
-                    "severity": "ERROR",
-                    "check": self._check_tier1_total,
-                    "description": "Tier 1 capital must equal CET1 + AT1"
-                },
-                {
-                    "id": "v0003",
-                    "name": "Total Own Funds Consistency",
-                    "severity": "ERROR",
-                    "check": self._check_total_own_funds,
-                    "description": "Total own funds must equal Tier 1 + Tier 2"
-                },
-                {
-                    "id": "v0004",
-                    "name": "Non-Negative CET1",
-                    "severity": "ERROR",
-                    "check": self._check_non_negative_cet1,
-                    "description": "CET1 capital cannot be negative"
-                },
-                # Warning rules
-                {
-                    "id": "v0010",
-                    "name": "Missing CET1 Components",
-                    "severity": "WARNING",
-                    "check": self._check_cet1_components_present,
-                    "description": "At least one CET1 component should be reported"
-                },
-                {
-                    "id": "v0011",
-                    "name": "Large AT1 Ratio",
-                    "severity": "WARNING",
-                    "check": self._check_at1_ratio,
-                    "description": "AT1 should typically not exceed 1/3 of Tier 1 capital"
-                },
-                {
-                    "id": "v0012",
-                    "name": "Tier 2 Limit",
-                    "severity": "WARNING",
-                    "check": self._check_tier2_limit,
-                    "description": "Tier 2 capital typically should not exceed Tier 1 capital"
-                }
-            ]
+    def __init__(self):
+        self._rule_tables: Dict[str, Tuple[tuple, ...]] = {"C01": _RULES_C01}
+        # Each rule compiled once into (result-producing closure, passing
+        # result, batch failure mask or None)
+        self._compiled: Dict[str, Tuple[tuple, ...]] = {
+            template_type: tuple(self._compile_rule(*rule) for rule in rules)
+            for template_type, rules in self._rule_tables.items()
         }
+        # Identical templates (retries, re-renders) reuse their results;
+        # per instance, so the cache is collected along with the engine
+        self._validate_cached = lru_cache(maxsize=1024)(self._validate_rows)
     
     def validate(self, template: C01OwnFundsTemplate, template_type: str) -> List[Dict[str, Any]]:
         """Run all validation rules for a template."""
-        results = []
-        
-        rules = self.rules.get(template_type, [])
-        for rule in rules:
-            check_fn = rule["check"]
-            passed, message, affected = check_fn(template)
-            
-            results.append({
-                "rule_id": rule["id"],
-                "rule_name": rule["name"],
-                "severity": rule["severity"],
-                "passed": passed,
-                "message": message if not passed else "OK",
-                "affected_fields": affected,
-                "description": rule["description"]
-            })
-        
-        return results
+        results = self._validate_cached(_extract_rows(template), template.currency, template_type)
+        # Copies, so callers can't alter cached results
+        return [_copy_result(r) for r in results]
     
-    def get_rules(self, template_type: str) -> List[Dict[str, Any]]:
-        """Get all rules for a template type."""
-        rules = self.rules.get(template_type, [])
-        return [{
-            "id": r["id"],
-            "name": r["name"],
-            "severity": r["severity"],
-            "description": r["description"]
-        } for r in rules]
-    
-    # === Validation Check Functions ===
-    
-    def _check_cet1_total(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check that CET1 total equals sum of components."""
-        components = [
-            t.row_010 or 0,
-            t.row_020 or 0,
-            t.row_030 or 0,
-            t.row_040 or 0,
-            t.row_050 or 0,
-            t.row_060 or 0,
-            t.row_070 or 0
-        ]
-        expected = sum(components)
-        actual = t.row_100 or 0
+    def validate_batch(
+        self,
+        templates: List[C01OwnFundsTemplate],
+        template_type: str
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run all validation rules for many templates of one type at once.
         
-        if abs(actual - expected) > 0.01:  # Allow for rounding
-            return (
-                False,
-                f"CET1 before adjustments ({actual:,.0f}) != sum of components ({expected:,.0f})",
-                ["row_100", "row_010", "row_020", "row_030", "row_040", "row_050", "row_060"]
-            )
-        return (True, "", [])
-    
-    def _check_tier1_total(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check that Tier 1 equals CET1 + AT1."""
-        cet1 = t.row_200 or 0
-        at1 = t.row_300 or 0
-        expected = cet1 + at1
-        actual = t.row_400 or 0
+        Rules are evaluated as vectorised masks over an (N, rows) array, so
+        only failing templates go through the per-template checks.
+        """
+        rules = self._compiled.get(template_type, ())
+        if not templates or not rules:
+            return [[] for _ in templates]
         
-        if abs(actual - expected) > 0.01:
-            return (
-                False,
-                f"Tier 1 ({actual:,.0f}) != CET1 ({cet1:,.0f}) + AT1 ({at1:,.0f})",
-                ["row_400", "row_200", "row_300"]
-            )
-        return (True, "", [])
-    
-    def _check_total_own_funds(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check total own funds consistency."""
-        t1 = t.row_400 or 0
-        t2 = t.row_600 or 0
-        expected = t1 + t2
-        actual = t.row_700 or 0
+        # None becomes NaN on conversion, then 0.0 in one pass
+        values = np.array([_extract_rows(t) for t in templates], dtype=np.float64)
+        values[np.isnan(values)] = 0.0
         
-        if abs(actual - expected) > 0.01:
-            return (
-                False,
-                f"Total own funds ({actual:,.0f}) != Tier 1 ({t1:,.0f}) + Tier 2 ({t2:,.0f})",
-                ["row_700", "row_400", "row_600"]
-            )
-        return (True, "", [])
+        results: List[List[Dict[str, Any]]] = [[] for _ in templates]
+        for run, pass_result, fails in rules:
+            flagged = fails(values) if fails else np.ones(len(templates), dtype=bool)
+            for i, flag in enumerate(flagged.tolist()):
+                results[i].append(_copy_result(run(values[i]) if flag else pass_result))
+        return results
     
-    def _check_non_negative_cet1(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check that CET1 is non-negative."""
-        cet1 = t.row_200 or 0
-        if cet1 < 0:
-            return (
-                False,
-                f"CET1 capital is negative: {cet1:,.0f}",
-                ["row_200"]
-            )
-        return (True, "", [])
+    def _validate_rows(
+        self,
+        rows: Tuple[Optional[float], ...],
+        currency: str,
+        template_type: str
+    ) -> Tuple[Dict[str, Any], ...]:
+        """Run all validation rules over a template's row values."""
+        rules = self._compiled.get(template_type, ())
+        if not rules:
+            return ()
+        values = _to_vector(rows)
+        return tuple(run(values) for run, _, _ in rules)
     
-    def _check_cet1_components_present(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check that at least one CET1 component is present."""
-        components = [t.row_010, t.row_020, t.row_030, t.row_040, t.row_050, t.row_060]
-        if all(c is None or c == 0 for c in components):
-            return (
-                False,
-                "No CET1 capital components reported",
-                ["row_010", "row_020", "row_030", "row_040", "row_050", "row_060"]
-            )
-        return (True, "", [])
-    
-    def _check_at1_ratio(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check AT1 ratio is reasonable."""
-        at1 = t.row_300 or 0
-        t1 = t.row_400 or 0
+    @staticmethod
+    def _compile_rule(
+        rule_id: str,
+        rule_name: str,
+        severity: str,
+        check_fn: Callable[[np.ndarray], tuple],
+        description: str
+    ) -> tuple:
+        """Pre-bind a rule's check and metadata into a single closure."""
+        # Most checks pass, so their result is prebuilt and shared; it is only
+        # ever handed out through _copy_result
+        pass_result = {
+            "rule_id": rule_id,
+            "rule_name": rule_name,
+            "severity": severity,
+            "passed": True,
+            "message": "OK",
+            "affected_fields": [],
+            "description": description
+        }
         
-        if t1 > 0 and at1 > 0:
-            ratio = at1 / t1
-            if ratio > 0.33:
-                return (
-                    False,
-                    f"AT1 is {ratio:.1%} of Tier 1 (typically should be ≤33%)",
-                    ["row_300", "row_400"]
-                )
-        return (True, "", [])
-    
-    def _check_tier2_limit(self, t: C01OwnFundsTemplate) -> tuple:
-        """Check Tier 2 doesn't exceed Tier 1."""
-        t1 = t.row_400 or 0
-        t2 = t.row_600 or 0
+        def run(values: np.ndarray) -> Dict[str, Any]:
+            passed, message, affected = check_fn(values)
+            if passed:
+                return pass_result
+            return {
+                "rule_id": rule_id,
+                "rule_name": rule_name,
+                "severity": severity,
+                "passed": False,
+                "message": message,
+                "affected_fields": affected,
+                "description": description
+            }
         
-        if t2 > t1 and t1 > 0:
-            return (
-                False,
-                f"Tier 2 ({t2:,.0f}) exceeds Tier 1 ({t1:,.0f})",
-                ["row_600", "row_400"]
-            )
-        return (True, "", [])
+        return run, pass_result, _BATCH_MASKS.get(check_fn)
+    
+    def get_rules(self, template_type: str) -> List[Dict[str, Any]]:
+        """Get all rules for a template type."""
+        rules = self._rule_tables.get(template_type, ())
+        return [{
+            "id": rule_id,
+            "name": name,
+            "severity": severity,
+            "description": description
+        } for rule_id, name, severity, _, description in rules]